@@ -5,7 +5,7 @@
 
 from PySide6 import QtWidgets, QtGui, QtCore
 from PySide6.QtWidgets import QTableWidgetItem, QApplication, QDialog, QLineEdit, QMainWindow, QPushButton, QTableView, QTableWidget, QTextBrowser, QWidget
-from PySide6.QtCore import QFile, Qt
+from PySide6.QtCore import QFile, QSocketNotifier, Qt
 from PySide6.QtUiTools import QUiLoader
 
 import os
@@ -17,38 +17,100 @@ import subprocess
 import html
 import time
 import select
+import selectors
 import traceback
 import struct
+import re
+import collections
+from xml.etree import ElementTree
+try:
+    import capstone
+except ImportError:
+    capstone = None
 
 
 # The Client of the GDB RSP Protocol
 class RSPClient():
+    # Max bytes taken from the socket per recv()
+    RECV_CHUNK = 65536
+    # Max bytes per memory read packet / qXfer request
+    XFER_CHUNK = 65536
+    # Max bytes per memory write packet. The payload is hex encoded and the
+    # whole packet must fit in the stub's input buffer (16KB on OpenOCD).
+    WRITE_CHUNK = 4096
+    # Seconds to wait for the server before giving up
+    TIMEOUT = 10
+    # Breakpoint/watchpoint types of the Z/z packets
+    _TYPE_IDS = {'soft':0, 'hard':1, 'read':2, 'write':3, 'access':4}
+    # struct formats of the unsigned integers by size
+    _UINT_FORMATS = {1:'<B', 2:'<H', 4:'<I', 8:'<Q'}
+    # Byte values used while parsing packets
+    _B_HASH = b'#'[0]
+    _B_DOLLAR = b'$'[0]
+    _B_T = b'T'[0]
+    _B_O = b'O'[0]
+    # Bytes that have to be escaped in a packet
+    _ESCAPE_RE = re.compile(rb'[#$}*]')
+    # Escape and run-length markers in a received packet
+    _UNESCAPE_RE = re.compile(rb'[}*]')
+    # Prebuilt frames of commands that get no direct response
+    _FRAME_CONTINUE = b'$vCont;c#a8'
+    _FRAME_STEP = b'$s#73'
 
     def __init__(self, ui) -> None:
         self._socket: socket.socket = None
         self._connected: bool = False
+        self._notifier: QSocketNotifier = None
+        self._sel: selectors.BaseSelector = None
         self._ui = ui
-        self._pendingData:bytes = b''
+        self._pendingData:bytearray = bytearray()
+        # Offset in _pendingData up to which no '#' has been found yet
+        self._scanPos:int = 0
+        # Received responses not yet claimed by a caller
+        self._respQueue:collections.deque = collections.deque()
+        # Set when a stop packet arrived, handled once no reply is awaited
+        self._stopPending:bool = False
 
     def connect(self, host, port):
+        # Drop anything left over from a previous connection
+        self._pendingData = bytearray()
+        self._scanPos = 0
+        self._respQueue.clear()
+        self._stopPending = False
         self._socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
         self._socket.connect((host, port))
         # Set NODELAY
         self._socket.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
-        # Set recv timeout to 10 seconds
-        self._socket.settimeout(10)
+        # Use a non-blocking socket, and only wait in the selector when there
+        # is nothing to receive yet. In timeout mode every recv() polls first.
+        self._socket.setblocking(False)
+        self._sel = selectors.DefaultSelector()
+        self._sel.register(self._socket, selectors.EVENT_READ)
         if self._rspGetAck() != True:
             print('No ack from GDB server')
+            self._sel.close()
             self._socket.close()
             return False
         self._connected = True
+        # Let the Qt event loop tell us when the server sends something
+        self._notifier = QSocketNotifier(self._socket.fileno(), QSocketNotifier.Read)
+        self._notifier.activated.connect(self._onSocketReadable)
         # Enable NoAckMode
         self.rspCall(b'QStartNoAckMode', waitForAck=True)
         # Set to extended mode
         self.rspCall(b'!')
         
-        # Query target xml
-        xml = self.rspCall(b'qXfer:features:read:target.xml:0,9999')[1:]
+        # Query target xml, the stub may return it in several pieces
+        xml = b''
+        while True:
+            ret = self.rspCall(b'qXfer:features:read:target.xml:%x,%x' % (len(xml), self.XFER_CHUNK))
+            if not ret or ret[:1] not in (b'm', b'l'):
+                print('Failed to read target xml:', ret)
+                break
+            xml += ret[1:]
+            # 'l' marks the last piece
+            if ret[:1] == b'l':
+                break
         with open('target.xml', 'wb') as f:
             f.write(xml)
         self._ui.onTargetXmlUpdated(xml)
@@ -57,6 +119,13 @@ class RSPClient():
 
     def disconnect(self):
         self._connected = False
+        self._stopPending = False
+        if self._notifier != None:
+            # May be called from the notifier's own slot, so delete it later
+            self._notifier.setEnabled(False)
+            self._notifier.deleteLater()
+            self._notifier = None
+        self._sel.close()
         self._socket.close()
         self._ui.onStateUpdated(None)
         return True
@@ -64,114 +133,208 @@ class RSPClient():
     """
     GDB RSP protocol basic concepts:
     1. Packet starts with "$", ends with "#" and checksum(two hex digits)
-    2. "$", "#", "}" in the middle of packet is escaped by "}" following char xor
+    2. "$", "#", "}", "*" in the middle of packet is escaped by "}" following char xor
     0x20.
-    3. "*" indicates the beginning of RLE encoded data (we don't support this for now).
+    3. "*" followed by a count char n repeats the previous char (n - 29) times (RLE).
     """
 
     def _rspEscape(self, data: bytes):
-        # TODO: do escaping
-        return data
+        if self._ESCAPE_RE.search(data) == None:
+            return data
+        return self._ESCAPE_RE.sub(lambda m: b'}' + bytes([m.group()[0] ^ 0x20]), data)
 
     def _rspUnescape(self, data: bytes):
-        # TODO: do unescaping
-        return data
+        # Only visit the marker positions, most packets have none at all
+        m = None if data == None else self._UNESCAPE_RE.search(data)
+        if m == None:
+            return data
+        out = bytearray()
+        pos = 0
+        for m in self._UNESCAPE_RE.finditer(data, m.start()):
+            i = m.start()
+            if i < pos:
+                # The marker is the argument of the previous one
+                continue
+            if i + 1 >= len(data):
+                print('Malformed data:', data)
+                break
+            out += data[pos:i]
+            if data[i] == 0x2a:
+                out += out[-1:] * (data[i+1] - 29)
+            else:
+                out.append(data[i+1] ^ 0x20)
+            pos = i + 2
+        out += data[pos:]
+        return bytes(out)
 
     def _rspGetAck(self):
         # Receive one byte from socket
-        data = self._socket.recv(1)
+        while not self._pendingData:
+            if not self._fillBuffer():
+                return False
+        data = bytes(self._pendingData[:1])
+        del self._pendingData[:1]
+        self._scanPos = max(0, self._scanPos - 1)
         if data == b'+':
             return True
         else:
             print('Unknown Ack:', data)
             return False
 
-    def _rspConsumePackets(self):
-        ret = None
-        # Receive packet
+    # Split all complete packets off the start of _pendingData
+    # The buffer is trimmed once at the end, rather than once per packet
+    def _rspParse(self):
+        buf = self._pendingData
+        end = len(buf)
+        packets = []
+        pos = 0
+        with memoryview(buf) as mv:
+            while True:
+                start = buf.find(self._B_DOLLAR, pos)
+                if start == -1:
+                    start = end
+                if start > pos:
+                    # Acks and other bytes outside of a packet
+                    junk = bytes(mv[pos:start])
+                    if junk.strip(b'+'):
+                        print('Malformed data:', junk)
+                if start == end:
+                    pos = end
+                    self._scanPos = end
+                    break
+                hashPos = buf.find(self._B_HASH, max(self._scanPos, start + 1))
+                # The packet is complete once both checksum digits have arrived
+                if hashPos == -1 or hashPos + 3 > end:
+                    # Resume from here once more data arrives
+                    pos = start
+                    self._scanPos = end if hashPos == -1 else hashPos
+                    break
+                packets.append(bytes(mv[start+1:hashPos]))
+                pos = hashPos + 3
+        del buf[:pos]
+        self._scanPos -= pos
+        return packets
+
+    # Receive once into _pendingData
+    # Returns False if the connection is lost
+    # Unless wait is set, returns right away when there is nothing to receive
+    def _fillBuffer(self, wait=True):
         while True:
-            data = self._socket.recv(30000)
-            if not data:
-                print('Disconnected')
-                self.disconnect()
-                return None
-            self._pendingData += data
-            if self._pendingData[-3] == ord('#'):
-                break
-        while(True):
-            pos = self._pendingData.find(b'#')
-            if pos == -1:
+            try:
+                data = self._socket.recv(self.RECV_CHUNK)
                 break
-            pkt = self._pendingData[:pos]
-            self._pendingData = self._pendingData[pos+1:]
-            pos2 = pkt.find(b'$')
-            if pos2 == -1:
-                print('Malformed data:', pkt)
-                continue
-            pkt = pkt[pos2+1:]
+            except BlockingIOError:
+                if not wait:
+                    return True
+                if not self._sel.select(self.TIMEOUT):
+                    raise socket.timeout('Timed out waiting for the server')
+        if not data:
+            print('Disconnected')
+            self.disconnect()
+            return False
+        self._pendingData.extend(data)
+        return True
+
+    # Handle all complete packets already received, queueing the responses
+    def _rspConsumePackets(self):
+        for pkt in self._rspParse():
             if len(pkt) >= 3:
-                if pkt[0] == ord('T'):
+                if pkt[0] == self._B_T:
                     print('Trap:', pkt)
-                    newState = b'T' + pkt[1:]
-                    self._ui.onStateUpdated('paused')
+                    # Handling it now would issue requests of its own while
+                    # a caller may still be waiting for a queued reply
+                    self._stopPending = True
                     continue
-                if pkt[0] == ord('O'):
+                if pkt[0] == self._B_O:
                     # Print log messages
                     print('Log:', unhexlify(pkt[1:]))
                     continue
-            if ret != None:
-                print('Ignored:', ret)
-            ret = pkt
-        return ret
+            self._respQueue.append(pkt)
 
 
     def _rspCheckUnexpectedData(self):
-        # Use select to check if there is data to read
-        r, w, e = select.select([self._socket], [], [], 0)
-        if r:
-            data = self._rspConsumePackets()
-            if data != None:
-                print('Unexpected:', data)
+        # The socket is non-blocking, so this only takes what has arrived
+        if not self._fillBuffer(wait=False):
+            return
+        self._rspConsumePackets()
+        while self._respQueue:
+            print('Unexpected:', self._respQueue.popleft())
+        self._rspHandleStop()
+
+    # Report a stop packet received earlier, once no reply is outstanding
+    def _rspHandleStop(self):
+        if self._stopPending and self._connected:
+            self._stopPending = False
+            self._ui.onStateUpdated('paused')
             
     def _rspRecvPacket(self):
-        # Receive packet
-        while True:
-            ret = self._rspConsumePackets()
-            if ret != None:
-                return ret
-
-
-    def rspCall(self, data: bytes, waitForAck=False, waitForResp=True):
+        # Only wait for more data when nothing is buffered
+        self._rspConsumePackets()
+        while not self._respQueue:
+            if not self._fillBuffer():
+                return None
+            self._rspConsumePackets()
+        return self._respQueue.popleft()
+
+    def _rspSendOnly(self, data):
+        # data may be given as a list of pieces, which are sent as one packet.
+        # This saves joining large payloads before they are framed.
+        if not isinstance(data, list):
+            data = [data]
         # Ensure data is a bytes
-        if not isinstance(data, bytes):
-            data = data.encode('utf8')
+        data = [d.encode('utf8') if isinstance(d, str) else d for d in data]
+        data = [self._rspEscape(d) for d in data]
+        # Calculate checksum
+        checksum = sum(map(sum, data)) & 0xFF
+        # Send the whole frame at once, so it goes out in a single segment
+        frame = [b'$', *data, b'#%02x' % checksum]
+        if hasattr(self._socket, 'sendmsg'):
+            # Scatter-gather send, the pieces are not joined unless it falls short
+            try:
+                sent = self._socket.sendmsg(frame)
+            except BlockingIOError:
+                sent = 0
+            if sent < sum(map(len, frame)):
+                self._sendAll(b''.join(frame)[sent:])
+        else:
+            # No sendmsg on Windows
+            self._sendAll(b''.join(frame))
+
+    # sendall() for the non-blocking socket, waits while the send buffer is full
+    def _sendAll(self, data):
+        data = memoryview(data)
+        while data:
+            try:
+                data = data[self._socket.send(data):]
+            except BlockingIOError:
+                r, w, e = select.select([], [self._socket], [], self.TIMEOUT)
+                if not w:
+                    raise socket.timeout('Timed out sending to the server')
+
+    def rspCall(self, data, waitForAck=False, waitForResp=True):
         if not self._connected:
             raise Exception('Not connected')
             return False
-        data = self._rspEscape(data)
         # Send the packet
         try:
             self._rspCheckUnexpectedData()
-            self._socket.sendall(b'$')
-            self._socket.sendall(data)
-            self._socket.sendall(b'#')
-            # Calculate checksum
-            checksum = 0
-            for b in data:
-                checksum += b
-            checksum &= 0xFF
-            self._socket.sendall(b'%02x' % checksum)
+            self._rspSendOnly(data)
             # Wait for ACK
             if waitForAck:
                 self._rspGetAck()
             if not waitForResp:
-                return True
-            return self._rspUnescape(self._rspRecvPacket())
+                ret = True
+            else:
+                ret = self._rspUnescape(self._rspRecvPacket())
         except Exception as e:
             print('Socket error:', e)
             # print stack trace
             traceback.print_exc()
             self.disconnect()
+            return None
+        # The reply has been taken, so a stop packet can be handled now
+        self._rspHandleStop()
+        return ret
  
 
     def read(self, addr, size):
@@ -180,7 +343,7 @@ class RSPClient():
 
     def _readUInt(self, addr, size):
         ret = self.read(addr, size)
-        return int.from_bytes(ret, byteorder='little')
+        return struct.unpack_from(self._UINT_FORMATS[size], ret)[0]
 
     def read8(self, addr):
         return self._readUInt(addr, 1)
@@ -197,18 +360,76 @@ class RSPClient():
     def readToFile(self, addr, size, file="read.bin"):
         with open(file, 'wb') as f:
             while size > 0:
-                data = self.read(addr, min(size, 4096))
+                data = self.read(addr, min(size, self.XFER_CHUNK))
                 f.write(data)
                 addr += len(data)
                 size -= len(data)
         return True
 
+    # Like readToFile, but keeps up to depth requests in flight, so the
+    # transfer is not bound by the round trip time of each request.
+    def readToFilePipelined(self, addr, size, file="read.bin", depth=8):
+        if not self._connected:
+            raise Exception('Not connected')
+        if size <= 0:
+            # Nothing to request, leave an empty file like readToFile does
+            open(file, 'wb').close()
+            return True
+        try:
+            self._rspCheckUnexpectedData()
+            startAddr = addr
+            chunkSize = self.XFER_CHUNK
+            # Ranges still to be requested
+            toRequest = collections.deque([(addr, size)])
+            # The stub answers in order, so each reply matches the oldest request
+            inFlight = collections.deque()
+            with open(file, 'wb') as f:
+                while toRequest or inFlight:
+                    while toRequest and len(inFlight) < depth:
+                        addr, size = toRequest[0]
+                        chunk = min(size, chunkSize)
+                        self._rspSendOnly(b'm%x,%x' % (addr, chunk))
+                        inFlight.append((addr, chunk))
+                        if chunk == size:
+                            toRequest.popleft()
+                        else:
+                            toRequest[0] = (addr + chunk, size - chunk)
+                    ret = self._rspUnescape(self._rspRecvPacket())
+                    if ret == None:
+                        return False
+                    reqAddr, chunk = inFlight.popleft()
+                    if not ret or len(ret) % 2 or len(ret) > chunk * 2:
+                        print('Read failed at: %08x' % reqAddr, ret)
+                        # Drain the replies of the remaining requests
+                        while inFlight:
+                            inFlight.popleft()
+                            if self._rspRecvPacket() == None:
+                                break
+                        return False
+                    data = unhexlify(ret)
+                    # Replies may complete out of address order once a short one
+                    # has been requested again, so write each at its own offset
+                    f.seek(reqAddr - startAddr)
+                    f.write(data)
+                    if len(data) < chunk:
+                        # The stub caps the reply size, ask for the rest first
+                        # and keep later requests within that limit
+                        chunkSize = min(chunkSize, len(data))
+                        toRequest.appendleft((reqAddr + len(data), chunk - len(data)))
+            return True
+        except Exception as e:
+            print('Socket error:', e)
+            traceback.print_exc()
+            self.disconnect()
+            return False
+        finally:
+            self._rspHandleStop()
+
     def write(self, addr, data):
-        data = hexlify(data)
-        return self.rspCall(b'M%x,%x:%s' % (addr, len(data) // 2, data))
+        return self.rspCall([b'M%x,%x:' % (addr, len(data)), hexlify(data)])
 
     def _writeUInt(self, addr, uint: int, size):
-        return self.write(addr, uint.to_bytes(size, byteorder='little'))
+        return self.write(addr, struct.pack(self._UINT_FORMATS[size], uint))
 
     def write8(self, addr, uint: int):
         return self._writeUInt(addr, uint, 1)
@@ -223,33 +444,48 @@ class RSPClient():
         return self._writeUInt(addr, uint, 8)
 
     def writeFromFile(self, addr, file="write.bin", maxSize=-1):
+        # Stream the file one chunk at a time through a reused buffer,
+        # slicing a memoryview does not copy the data
+        buf = memoryview(bytearray(self.WRITE_CHUNK))
         with open(file, 'rb') as f:
-            if maxSize == -1:
-                data = f.read()
-            else:
-                data = f.read(maxSize)
-        pos = 0
-        while pos < len(data):
-            if self.write(addr, data[pos:pos+4096]) == False:
-                print('Write failed at: %08x' % addr)
-                return False
-            addr += 4096
-            pos += 4096
+            while maxSize != 0:
+                size = self.WRITE_CHUNK if maxSize == -1 else min(maxSize, self.WRITE_CHUNK)
+                size = f.readinto(buf[:size])
+                if not size:
+                    break
+                if self.write(addr, buf[:size]) == False:
+                    print('Write failed at: %08x' % addr)
+                    return False
+                addr += size
+                if maxSize != -1:
+                    maxSize -= size
         return True
 
+    # Send a prebuilt frame or control byte, bypassing rspCall
+    def _rspSendRaw(self, frame: bytes):
+        if not self._connected:
+            raise Exception('Not connected')
+        try:
+            self._sendAll(frame)
+            return True
+        except Exception as e:
+            print('Socket error:', e)
+            traceback.print_exc()
+            self.disconnect()
+            return False
+
     def go(self):
         # Continues execution of the target program
-        self.rspCall(b'vCont;c', waitForResp=False)
+        if not self._rspSendRaw(self._FRAME_CONTINUE):
+            return False
         self._ui.onStateUpdated('running')
         return True
     
     def step(self):
-        self.rspCall(b's', waitForResp=False)
-        return True
+        return self._rspSendRaw(self._FRAME_STEP)
 
     def pause(self):
-        self._socket.sendall(b'\x03')
-        return True
+        return self._rspSendRaw(b'\x03')
 
     def monitorCmd(self, cmd):
         cmd = b'qRcmd,%s' % hexlify(cmd)
@@ -261,8 +497,11 @@ class RSPClient():
         time.sleep(1)
         self._ui.onStateUpdated('paused')
     
+    def _onSocketReadable(self):
+        self.poll()
+
     # Poll the server for current status
-    # Must be called periodically
+    # Called whenever the socket becomes readable
     def poll(self):
         if not self._connected:
             return False
@@ -280,7 +519,7 @@ class RSPClient():
         return self.rspCall('p%02x' % regID)
     
     def _getTypeID(self, type):
-        return {'soft':0, 'hard':1, 'read':2, 'write':3, 'access':4}[type]
+        return self._TYPE_IDS[type]
 
     def bpadd(self, addr, type='soft', size = 4):
         type = self._getTypeID(type)
@@ -302,9 +541,26 @@ class UIInterface():
         self.isPaused:bool = False
         self.PC:int = 0
         self.regs = [0] * 32
+        # Index of PC in the register list of the 'g' packet
+        self.pcIndex:int = 32
+        self.regBitWidth:int = 32
+        # Register values are zero-padded to the register width
+        self._regFormat:str = '0x%08x'
+        # Items of the value column of tableRegs, updated in place
+        self._regItems = []
         self.disasmMemCache = {}
+        # Disassemble in-process when capstone is available, objdump otherwise.
+        # Created once the register width of the target is known.
+        self._cs = None
     
     def onTargetXmlUpdated(self, xml):
+        self.pcIndex, self.regBitWidth = self._findPCReg(xml)
+        self._regFormat = '0x%%0%dx' % (self.regBitWidth // 4)
+        if capstone != None:
+            mode = capstone.CS_MODE_RISCV64 if self.regBitWidth == 64 else capstone.CS_MODE_RISCV32
+            self._cs = capstone.Cs(capstone.CS_ARCH_RISCV, mode | capstone.CS_MODE_RISCVC)
+            # Keep going past bytes that do not decode, as objdump does
+            self._cs.skipdata = True
         # TODO: parse xml, rather than use hard-coded values
         RISCV_REG_NAMES = [
             'PC',
@@ -320,13 +576,30 @@ class UIInterface():
         tableRegs.setColumnCount(2)
         tableRegs.setHorizontalHeaderLabels(['Name', 'Value'])
         # Insert items
+        self._regItems = [QtWidgets.QTableWidgetItem('?') for _ in RISCV_REG_NAMES]
         for i, name in enumerate(RISCV_REG_NAMES):
             tableRegs.setItem(i, 0, QtWidgets.QTableWidgetItem(name))
-            tableRegs.setItem(i, 1, QtWidgets.QTableWidgetItem('?'))
+            tableRegs.setItem(i, 1, self._regItems[i])
             tableRegs.setRowHeight(i, 10)
         # Hide the vertical header
         tableRegs.verticalHeader().setVisible(False)
 
+    # Returns the index and bit width of PC
+    def _findPCReg(self, xml):
+        # Registers without regnum follow the previous one
+        try:
+            root = ElementTree.fromstring(xml)
+        except ElementTree.ParseError as e:
+            print('Failed to parse target xml:', e)
+            return 32, 32
+        regnum = 0
+        for reg in root.iter('reg'):
+            regnum = int(reg.get('regnum', regnum))
+            if reg.get('name') == 'pc':
+                return regnum, int(reg.get('bitsize', 32))
+            regnum += 1
+        return 32, 32
+
     def onStateUpdated(self, newState):
         print("State updated:", newState)
         isPaused = newState == 'paused'
@@ -341,23 +614,30 @@ class UIInterface():
             self.onPaused()
 
     def parseRegs(self, hex, bitWidth = 32):
-        # TODO: handle 64-bit processors
         buf = unhexlify(hex)
-        regs = []
-        for i in range(0, len(buf), bitWidth // 8):
-            regs.append(int.from_bytes(buf[i:i+bitWidth//8], byteorder='little'))
-        return regs
+        # Registers are sent in target byte order, which is little-endian on RISC-V
+        fmt = '<%d%s' % (len(buf) // (bitWidth // 8), 'I' if bitWidth == 32 else 'Q')
+        return list(struct.unpack_from(fmt, buf))
     
     def onPaused(self):
-        # update PC, assume the PC index is 32
-        self.PC = self.parseRegs(client.getOneReg(32))[0]
-        self.regs = self.parseRegs(client.getRegs())
+        # The 'g' packet normally carries PC as well, saving a round trip
+        self.regs = self.parseRegs(client.getRegs(), self.regBitWidth)
+        if self.pcIndex < len(self.regs):
+            self.PC = self.regs[self.pcIndex]
+        else:
+            self.PC = self.parseRegs(client.getOneReg(self.pcIndex), self.regBitWidth)[0]
         print(self.regs)
-        for i in range(1, 32):
-            # Update regs to the UI
-            tableRegs.setItem(i, 1, QTableWidgetItem(hex(self.regs[i])))
-        # Update PC to table row 0
-        tableRegs.setItem(0, 1, QTableWidgetItem(hex(self.PC)))
+        # Update the existing items, and repaint the table only once
+        fmt = self._regFormat
+        tableRegs.setUpdatesEnabled(False)
+        try:
+            for i in range(1, 32):
+                # Update regs to the UI
+                self._regItems[i].setText(fmt % self.regs[i])
+            # Update PC to table row 0
+            self._regItems[0].setText(fmt % self.PC)
+        finally:
+            tableRegs.setUpdatesEnabled(True)
         txtDisasmAddr.setText(hex(self.PC))
 
     def onPauseGo(self):
@@ -375,6 +655,10 @@ class UIInterface():
     def updateDisasm(self):
         addr = int(txtDisasmAddr.text(), 16)
         data = client.read(addr, 1024)
+        if self._cs != None:
+            lines = ['%8x:\t%s\t%s' % (i.address, i.mnemonic, i.op_str) for i in self._cs.disasm(data, addr)]
+            tbDisasmResult.setText('\n'.join(lines))
+            return
         with open('disasm.tmp', 'wb') as f:
             f.write(data)
         args = ['--adjust-vma', '0x%x' % addr, '-m', 'riscv', '-b', 'binary', '-D', 'disasm.tmp']
@@ -503,9 +787,4 @@ if __name__ == "__main__":
         connectDialog.radioNew.setChecked(True)
     # Handle connect dialog accept
     connectDialog.accepted.connect(onDialogAccept)
-    # Create a timer to poll the server
-    timer = QtCore.QTimer()
-    timer.setInterval(500)
-    timer.timeout.connect(lambda: client.poll())
-    timer.start()
     sys.exit(app.exec_())